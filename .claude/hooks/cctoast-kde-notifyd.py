@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Notification daemon for notify-kde.py (Claude Code and Codex CLI hooks).
+
+Keeps one session bus connection open and forwards notifications received
+as JSON datagrams on $XDG_RUNTIME_DIR/cctoast-kde.sock to
+org.freedesktop.Notifications, so hook invocations don't pay for tool
+lookups, process spawns or a D-Bus handshake. notify-kde.py falls back to
+its own notification tools whenever the socket isn't there.
+
+Requires jeepney. Run it as a systemd user service:
+    cp cctoast-kde-notifyd.service ~/.config/systemd/user/
+    systemctl --user enable --now cctoast-kde-notifyd
+"""
+
+import functools
+import json
+import os
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from jeepney import DBusAddress, DBusErrorResponse, new_method_call
+from jeepney.io.blocking import DBusConnection, open_dbus_connection
+from jeepney.wrappers import unwrap_msg
+
+# Socket name under $XDG_RUNTIME_DIR (must match notify-kde.py)
+SOCKET_NAME = "cctoast-kde.sock"
+
+# Largest datagram accepted (must match notify-kde.py)
+MAX_DATAGRAM_SIZE = 65536
+
+# Notification timeout in milliseconds (KDE default is usually 5000)
+NOTIFICATION_TIMEOUT = 8000
+
+# Seconds to wait for the notification server to answer a Notify call
+DBUS_CALL_TIMEOUT = 2
+
+# Hint signatures accepted from notify-kde.py (see build_notify_hints there)
+HINT_TYPES = {"s": str, "y": int}
+
+# Sound file locations and extensions, in order of preference (must match notify-kde.py)
+SOUND_DIRS = (
+    Path("/usr/share/sounds/freedesktop/stereo"),
+    Path("/usr/share/sounds/Oxygen"),
+    Path.home() / ".local" / "share" / "sounds",
+)
+SOUND_EXTENSIONS = (".oga", ".ogg", ".wav")
+
+NOTIFY = DBusAddress(
+    "/org/freedesktop/Notifications",
+    bus_name="org.freedesktop.Notifications",
+    interface="org.freedesktop.Notifications",
+)
+
+DEBUG = os.environ.get("CCTOAST_DEBUG") == "1"
+
+
+def get_socket_path() -> Path:
+    """Get the datagram socket path."""
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if not runtime_dir:
+        raise SystemExit("ERROR: XDG_RUNTIME_DIR is not set")
+    return Path(runtime_dir) / SOCKET_NAME
+
+
+@functools.lru_cache(maxsize=None)
+def get_sound_index() -> Dict[str, Path]:
+    """
+    Index sound files in common locations by sound name, once per process.
+
+    Earlier directories and extensions win, as in notify-kde.py.
+    """
+    index: Dict[str, Path] = {}
+    for sound_dir in SOUND_DIRS:
+        found = []
+        try:
+            with os.scandir(sound_dir) as entries:
+                for entry in entries:
+                    stem, ext = os.path.splitext(entry.name)
+                    if ext in SOUND_EXTENSIONS and entry.is_file():
+                        found.append((SOUND_EXTENSIONS.index(ext), stem, entry.path))
+        except OSError:
+            continue
+        for _, stem, path in sorted(found):
+            index.setdefault(stem, Path(path))
+    return index
+
+
+@functools.lru_cache(maxsize=None)
+def get_sound_player() -> Optional[str]:
+    """Pick the first available sound file player, once per process."""
+    for player in ("paplay", "pw-play", "aplay"):
+        if shutil.which(player):
+            return player
+    return None
+
+
+def play_sound(sound_name: str, sound_file: Optional[Path]) -> None:
+    """Play a sound here, like play_sound in notify-kde.py."""
+    if sound_file is None:
+        # No file found, let canberra-gtk-play look it up in the sound theme
+        if not shutil.which("canberra-gtk-play"):
+            return
+        args = ["canberra-gtk-play", "-i", sound_name]
+    else:
+        player = get_sound_player()
+        if player is None:
+            return
+        args = [player, str(sound_file)]
+        if player == "aplay":
+            args.insert(1, "-q")
+
+    try:
+        subprocess.Popen(args, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    except OSError as e:
+        print(f"ERROR: {args[0]} failed: {e}", file=sys.stderr)
+
+
+def get_server_capabilities(conn: DBusConnection) -> Tuple[str, ...]:
+    """Ask the notification server for its capabilities."""
+    reply = conn.send_and_get_reply(
+        new_method_call(NOTIFY, "GetCapabilities"), timeout=DBUS_CALL_TIMEOUT
+    )
+    return tuple(unwrap_msg(reply)[0])
+
+
+def decode_hints(raw: Any) -> Dict[str, Tuple[str, Any]]:
+    """Convert request hints back to (signature, value) pairs, dropping bad ones."""
+    hints: Dict[str, Tuple[str, Any]] = {}
+    if not isinstance(raw, dict):
+        return hints
+    for key, item in raw.items():
+        if not (isinstance(item, list) and len(item) == 2):
+            continue
+        signature, value = item
+        if signature not in HINT_TYPES or type(value) is not HINT_TYPES[signature]:
+            continue
+        if signature == "y" and not 0 <= value <= 255:
+            continue
+        hints[key] = (signature, value)
+    return hints
+
+
+def notify(conn: DBusConnection, request: Dict[str, Any], server_plays_sound: bool) -> None:
+    """
+    Send one notification request to the notification server.
+
+    The client only sends sound-name. sound-file is added here when the
+    server plays sounds; otherwise the sound is played locally.
+    """
+    hints = decode_hints(request.get("hints"))
+    sound_name = hints.get("sound-name", ("s", ""))[1]
+    if sound_name:
+        sound_file = get_sound_index().get(sound_name)
+        if server_plays_sound:
+            if sound_file:
+                hints["sound-file"] = ("s", str(sound_file))
+        else:
+            del hints["sound-name"]
+            play_sound(sound_name, sound_file)
+
+    reply = conn.send_and_get_reply(
+        new_method_call(
+            NOTIFY,
+            "Notify",
+            "susssasa{sv}i",
+            (
+                str(request.get("app_name") or "Claude Code"),
+                0,
+                str(request.get("icon") or ""),
+                str(request.get("title") or ""),
+                str(request.get("message") or ""),
+                [],
+                hints,
+                NOTIFICATION_TIMEOUT,
+            ),
+        ),
+        timeout=DBUS_CALL_TIMEOUT,
+    )
+    unwrap_msg(reply)
+
+
+def serve(sock: socket.socket, conn: DBusConnection, server_plays_sound: bool) -> None:
+    """Forward datagrams to the notification server until interrupted."""
+    while True:
+        data = sock.recv(MAX_DATAGRAM_SIZE)
+        try:
+            request = json.loads(data)
+        except ValueError as e:
+            print(f"ERROR: Invalid request: {e}", file=sys.stderr)
+            continue
+        if not isinstance(request, dict):
+            print("ERROR: Invalid request: not a JSON object", file=sys.stderr)
+            continue
+
+        if DEBUG:
+            print(f"DEBUG: Notify: {request}", file=sys.stderr)
+
+        try:
+            notify(conn, request, server_plays_sound)
+        except DBusErrorResponse as e:
+            print(f"ERROR: Notify failed: {e}", file=sys.stderr)
+        except TimeoutError:
+            # Keep draining the socket rather than stalling behind the server
+            print("ERROR: Notify timed out", file=sys.stderr)
+
+
+def main() -> int:
+    """Main entry point."""
+    socket_path = get_socket_path()
+
+    # Exit through the cleanup below when systemd stops the service
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+
+    # Reap sound players without waiting on them
+    signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+
+    # Connection errors end the process; the systemd unit restarts it
+    conn = open_dbus_connection(bus="SESSION")
+
+    # Play sounds here for servers that ignore the sound hints, or that
+    # couldn't be asked (not started yet, or not answering)
+    try:
+        capabilities = get_server_capabilities(conn)
+    except DBusErrorResponse as e:
+        print(f"ERROR: GetCapabilities failed: {e}", file=sys.stderr)
+        capabilities = ()
+    except TimeoutError:
+        print("ERROR: GetCapabilities timed out", file=sys.stderr)
+        capabilities = ()
+    server_plays_sound = "sound" in capabilities
+
+    # Scan the sound directories now rather than on the first notification
+    get_sound_index()
+
+    # Remove a socket left behind by a previous run
+    try:
+        socket_path.unlink()
+    except FileNotFoundError:
+        pass
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sock:
+        sock.bind(str(socket_path))
+        os.chmod(socket_path, 0o600)
+        if DEBUG:
+            print(f"DEBUG: Listening on {socket_path}", file=sys.stderr)
+        try:
+            serve(sock, conn, server_plays_sound)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            try:
+                socket_path.unlink()
+            except FileNotFoundError:
+                pass
+            conn.close()
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,21 +6,28 @@ Supports both AI coding assistants with appropriate icons and message parsing.
 Compatible with:
 - Claude Code hooks (JSON via stdin)
 - Codex CLI notifications (JSON via argv[1])
+
+When cctoast-kde-notifyd.py is running, notifications are handed to it over
+a Unix socket instead of being sent from this process.
 """
 
-import argparse
+import atexit
+import functools
 import json
 import os
-import re
-import select
 import shutil
 import subprocess
 import sys
-import tempfile
+import time
 from dataclasses import dataclass
-from datetime import datetime
 from pathlib import Path
-from typing import Optional, Tuple, Dict, Any
+from types import SimpleNamespace
+from typing import Optional, Tuple, Dict, Any, List, Callable
+
+try:
+    import orjson
+except ImportError:  # orjson is optional, fall back to the json module
+    orjson = None
 
 # Platform identifiers
 PLATFORM_CLAUDE = "claude"
@@ -33,6 +40,14 @@ CLAUDE_NOTIFICATION_MESSAGE = "Waiting for your response"
 CLAUDE_STOP_TITLE = "Claude Code"
 CLAUDE_STOP_MESSAGE = "Task completed"
 
+# Claude Code notification titles by notification_type
+CLAUDE_TITLE_MAP = {
+    "permission_prompt": "Claude Code - Permission",
+    "idle_prompt": "Claude Code - Waiting",
+    "auth_success": "Claude Code - Authenticated",
+    "elicitation_dialog": "Claude Code - Input Required",
+}
+
 # Codex CLI defaults
 CODEX_TITLE = "Codex"
 CODEX_DEFAULT_MESSAGE = "Agent turn complete"
@@ -43,12 +58,68 @@ MAX_MESSAGE_LENGTH = 280
 # Notification timeout in milliseconds (KDE default is usually 5000)
 NOTIFICATION_TIMEOUT = 8000
 
+# Seconds to wait for the notification server to answer a D-Bus call
+DBUS_CALL_TIMEOUT = 2
+
+# freedesktop urgency hint values
+URGENCY_LEVELS = {"low": 0, "normal": 1, "critical": 2}
+
 # Sound settings - uses freedesktop sound theme names
 DEFAULT_SOUND = "message-new-instant"
 
+# Sound file locations and extensions, in order of preference
+SOUND_DIRS = (
+    Path("/usr/share/sounds/freedesktop/stereo"),
+    Path("/usr/share/sounds/Oxygen"),
+    Path.home() / ".local" / "share" / "sounds",
+)
+SOUND_EXTENSIONS = (".oga", ".ogg", ".wav")
+
 # TTS settings
 TTS_RATE = "-50"  # Speech rate adjustment (-100 to 100, negative is slower)
 
+# TTS engines in order of preference, as (command, build) where build(text, rate)
+# returns (argv, stdin_text or None). pico2wave is handled separately by
+# speak_pico2wave since it needs a temp file and a player.
+TTSBuilder = Callable[[str, str], Tuple[List[str], Optional[str]]]
+TTS_ENGINES: Tuple[Tuple[str, TTSBuilder], ...] = (
+    # spd-say first (speech-dispatcher, common on Linux)
+    ("spd-say", lambda text, rate: (["spd-say", "-r", rate, text], None)),
+    ("espeak-ng", lambda text, rate: (["espeak-ng", text], None)),
+    ("espeak", lambda text, rate: (["espeak", text], None)),
+    ("festival", lambda text, rate: (["festival", "--tts"], text)),
+)
+
+# Debug output, enabled with CCTOAST_DEBUG=1
+DEBUG = os.environ.get("CCTOAST_DEBUG") == "1"
+
+# D-Bus notification service address, built with the connection (jeepney only)
+NOTIFY = None
+
+# Session bus connection, opened on first use
+_DBUS_CONNECTION = None
+
+# Error log file descriptor, opened on the first error
+_LOG_FD: Optional[int] = None
+
+# Notification daemon socket under $XDG_RUNTIME_DIR (see cctoast-kde-notifyd.py)
+DAEMON_SOCKET_NAME = "cctoast-kde.sock"
+
+# Largest datagram the daemon accepts
+DAEMON_MAX_DATAGRAM_SIZE = 65536
+
+# Sound files keyed by sound name, indexed on first lookup
+_SOUND_INDEX: Optional[Dict[str, Path]] = None
+
+# Notification tool processes started but not yet waited on, as (tool, process)
+_PENDING_NOTIFICATIONS: List[Tuple[str, subprocess.Popen]] = []
+
+
+def _refresh_debug() -> None:
+    """Re-read CCTOAST_DEBUG, for callers that change the environment mid-run."""
+    global DEBUG
+    DEBUG = os.environ.get("CCTOAST_DEBUG") == "1"
+
 
 def get_script_dir() -> Path:
     """Get the directory containing this script."""
@@ -64,8 +135,7 @@ def detect_context() -> Tuple[str, Path]:
     script_dir = script_path.parent
     home = Path.home()
 
-    debug = os.environ.get("CCTOAST_DEBUG") == "1"
-    if debug:
+    if DEBUG:
         print(f"DEBUG: Script directory: {script_dir}", file=sys.stderr)
         print(f"DEBUG: Script path: {script_path}", file=sys.stderr)
 
@@ -118,53 +188,100 @@ def truncate_message(text: str, max_length: int = MAX_MESSAGE_LENGTH) -> str:
     """Truncate a message to max_length, adding ellipsis if needed."""
     if not text or len(text) <= max_length:
         return text
-    return text[: max_length - 3].rstrip() + "..."
+    # Back up over trailing whitespace in place rather than slicing then rstrip()
+    end = max_length - 3
+    while end > 0 and text[end - 1].isspace():
+        end -= 1
+    return text[:end] + "..."
+
+
+def load_json(data: str) -> Any:
+    """Parse a JSON document, using orjson when available."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def load_payload(data: str) -> Optional[Dict[str, Any]]:
+    """Parse a JSON object payload, returning None if it isn't one."""
+    try:
+        payload = load_json(data)
+    except (ValueError, TypeError):
+        return None
+    return payload if isinstance(payload, dict) else None
+
+
+def read_stdin_payload() -> Optional[Dict[str, Any]]:
+    """Read a Claude Code JSON payload from stdin, if one is waiting."""
+    # An interactive terminal never carries a hook payload, skip the wait
+    if os.isatty(0):
+        return None
+
+    import select
+
+    if not select.select([sys.stdin], [], [], 0.1)[0]:
+        return None
+
+    try:
+        stdin_content = sys.stdin.read()
+    except ValueError:  # undecodable input
+        return None
 
+    if not stdin_content.strip():
+        return None
+    return load_payload(stdin_content)
 
-def detect_ai_platform() -> Tuple[str, Optional[Dict[str, Any]]]:
+
+def resolve_platform(args: Any) -> Tuple[str, Optional[Dict[str, Any]]]:
     """
-    Detect which AI platform is calling based on input method.
+    Resolve which AI platform is calling, from parsed args and input method.
+
+    Stdin is only probed when Codex wasn't already identified from the
+    positional JSON argument or forced with --source codex.
 
     Returns:
         Tuple of (platform, payload_dict or None)
-        - If Codex: payload from argv[1]
+        - If Codex: payload from the positional argument
         - If Claude: payload from stdin
         - If manual: None
     """
-    debug = os.environ.get("CCTOAST_DEBUG") == "1"
-
-    # Check for Codex pattern: JSON as argv[1]
-    # Codex passes payload as first positional argument
-    if len(sys.argv) > 1 and not sys.argv[1].startswith("-"):
-        try:
-            payload = json.loads(sys.argv[1])
-            if isinstance(payload, dict) and "type" in payload:
-                if debug:
-                    print(f"DEBUG: Detected Codex CLI (argv[1] JSON with 'type')", file=sys.stderr)
-                return (PLATFORM_CODEX, payload)
-        except (json.JSONDecodeError, TypeError):
-            pass
+    if args.source != "auto" and DEBUG:
+        print(f"DEBUG: Platform forced to: {args.source}", file=sys.stderr)
+
+    # Check for Codex pattern: JSON as first positional argument
+    # Skip parsing entirely unless the discriminator key appears at all
+    if args.json_payload and args.source != PLATFORM_CLAUDE and '"type"' in args.json_payload:
+        payload = load_payload(args.json_payload)
+        if payload is not None and "type" in payload:
+            if DEBUG:
+                print("DEBUG: Detected Codex CLI (positional JSON with 'type')", file=sys.stderr)
+            return (PLATFORM_CODEX, payload)
+
+    if args.source == PLATFORM_CODEX:
+        return (PLATFORM_CODEX, None)
+
+    # A positional argument that isn't a Codex payload means manual mode
+    if args.json_payload and args.source == "auto":
+        if DEBUG:
+            print("DEBUG: Positional argument is not a Codex payload, manual mode", file=sys.stderr)
+        return (PLATFORM_MANUAL, None)
 
     # Check for Claude pattern: JSON via stdin
-    if select.select([sys.stdin], [], [], 0.1)[0]:
-        try:
-            stdin_content = sys.stdin.read()
-            if stdin_content.strip():
-                payload = json.loads(stdin_content)
-                if isinstance(payload, dict) and "hook_event_name" in payload:
-                    if debug:
-                        print(f"DEBUG: Detected Claude Code (stdin JSON with 'hook_event_name')", file=sys.stderr)
-                    return (PLATFORM_CLAUDE, payload)
+    payload = read_stdin_payload()
+    if payload is not None:
+        if DEBUG:
+            if "hook_event_name" in payload:
+                print("DEBUG: Detected Claude Code (stdin JSON with 'hook_event_name')", file=sys.stderr)
+            else:
                 # Could be Claude without hook_event_name, still treat as Claude
-                if isinstance(payload, dict):
-                    if debug:
-                        print(f"DEBUG: Detected Claude Code (stdin JSON)", file=sys.stderr)
-                    return (PLATFORM_CLAUDE, payload)
-        except (json.JSONDecodeError, TypeError):
-            pass
+                print("DEBUG: Detected Claude Code (stdin JSON)", file=sys.stderr)
+        return (PLATFORM_CLAUDE, payload)
+
+    if args.source == PLATFORM_CLAUDE:
+        return (PLATFORM_CLAUDE, None)
 
-    if debug:
-        print(f"DEBUG: No AI platform detected, manual mode", file=sys.stderr)
+    if DEBUG:
+        print("DEBUG: No AI platform detected, manual mode", file=sys.stderr)
     return (PLATFORM_MANUAL, None)
 
 
@@ -177,10 +294,9 @@ def parse_claude_payload(payload: Dict[str, Any]) -> ParsedPayload:
     - Stop hook: has stop_hook_active
     - Other hooks: session_id, cwd, etc.
     """
-    debug = os.environ.get("CCTOAST_DEBUG") == "1"
     hook_event = payload.get("hook_event_name", "")
 
-    if debug:
+    if DEBUG:
         print(f"DEBUG: Parsing Claude payload, hook_event_name={hook_event}", file=sys.stderr)
 
     if hook_event == "Notification":
@@ -188,13 +304,7 @@ def parse_claude_payload(payload: Dict[str, Any]) -> ParsedPayload:
         message = payload.get("message", CLAUDE_NOTIFICATION_MESSAGE)
 
         # Customize title based on notification type
-        title_map = {
-            "permission_prompt": "Claude Code - Permission",
-            "idle_prompt": "Claude Code - Waiting",
-            "auth_success": "Claude Code - Authenticated",
-            "elicitation_dialog": "Claude Code - Input Required",
-        }
-        title = title_map.get(notification_type, CLAUDE_NOTIFICATION_TITLE)
+        title = CLAUDE_TITLE_MAP.get(notification_type, CLAUDE_NOTIFICATION_TITLE)
 
         return ParsedPayload(
             platform=PLATFORM_CLAUDE,
@@ -246,10 +356,9 @@ def parse_codex_payload(payload: Dict[str, Any]) -> ParsedPayload:
     Handles:
     - agent-turn-complete: has last-assistant-message, input-messages
     """
-    debug = os.environ.get("CCTOAST_DEBUG") == "1"
     event_type = payload.get("type", "")
 
-    if debug:
+    if DEBUG:
         print(f"DEBUG: Parsing Codex payload, type={event_type}", file=sys.stderr)
 
     if event_type == "agent-turn-complete":
@@ -285,126 +394,138 @@ def parse_codex_payload(payload: Dict[str, Any]) -> ParsedPayload:
 
 def log_error(message: str) -> None:
     """Log an error message. Creates log file only on first error."""
-    log_path = get_log_path()
-    log_path.parent.mkdir(parents=True, exist_ok=True)
-    timestamp = datetime.now().isoformat()
-    with open(log_path, "a") as f:
-        f.write(f"[{timestamp}] ERROR: {message}\n")
+    global _LOG_FD
+    if _LOG_FD is None:
+        log_path = get_log_path()
+        log_path.parent.mkdir(parents=True, exist_ok=True)
+        _LOG_FD = os.open(log_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        atexit.register(os.close, _LOG_FD)
+    timestamp = time.strftime("%Y-%m-%dT%H:%M:%S")
+    os.write(_LOG_FD, f"[{timestamp}] ERROR: {message}\n".encode())
 
 
+@functools.lru_cache(maxsize=None)
 def find_command(name: str) -> Optional[str]:
-    """Check if a command exists and return its path."""
+    """Check if a command exists and return its path (cached per name)."""
     return shutil.which(name)
 
 
+@functools.lru_cache(maxsize=None)
+def get_tts_engine() -> Optional[Tuple[str, TTSBuilder]]:
+    """Pick the first available entry of TTS_ENGINES, resolved once per run."""
+    for command, build in TTS_ENGINES:
+        if find_command(command):
+            return (command, build)
+    return None
+
+
+@functools.lru_cache(maxsize=None)
+def get_sound_player() -> Optional[str]:
+    """Pick the first available sound file player, resolved once per run."""
+    for player in ("paplay", "pw-play", "aplay"):
+        if find_command(player):
+            return player
+    return None
+
+
+def speak_pico2wave(text: str) -> None:
+    """Synthesize text with pico2wave and play it with paplay or aplay."""
+    import tempfile
+
+    # Created securely and removed when the block exits; the player keeps
+    # its own handle on stdin, so it can outlive the file name
+    with tempfile.NamedTemporaryFile(suffix=".wav", prefix="cctoast-tts-") as tmp_wav:
+        try:
+            subprocess.run(
+                ["pico2wave", "-w", tmp_wav.name, text],
+                check=True,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+            with open(tmp_wav.name, "rb") as wav:
+                if find_command("paplay"):
+                    subprocess.Popen(
+                        ["paplay"],
+                        stdin=wav,
+                        stdout=subprocess.DEVNULL,
+                        stderr=subprocess.DEVNULL,
+                    )
+                elif find_command("aplay"):
+                    subprocess.Popen(
+                        ["aplay", "-q"],
+                        stdin=wav,
+                        stdout=subprocess.DEVNULL,
+                        stderr=subprocess.DEVNULL,
+                    )
+        except (subprocess.CalledProcessError, OSError):
+            pass
+
+
 def speak_text(text: str, rate: str = TTS_RATE) -> bool:
     """Speak text using available TTS engine."""
     if not text:
         return True
 
-    debug = os.environ.get("CCTOAST_DEBUG") == "1"
-    if debug:
+    if DEBUG:
         print(f"DEBUG: Speaking: {text}", file=sys.stderr)
 
-    # Try spd-say first (speech-dispatcher, common on Linux)
-    if find_command("spd-say"):
-        subprocess.Popen(
-            ["spd-say", "-r", rate, text],
-            stdout=subprocess.DEVNULL,
-            stderr=subprocess.DEVNULL,
-        )
-        return True
-
-    # Try espeak-ng
-    if find_command("espeak-ng"):
-        subprocess.Popen(
-            ["espeak-ng", text],
-            stdout=subprocess.DEVNULL,
-            stderr=subprocess.DEVNULL,
-        )
-        return True
-
-    # Try espeak
-    if find_command("espeak"):
-        subprocess.Popen(
-            ["espeak", text],
-            stdout=subprocess.DEVNULL,
-            stderr=subprocess.DEVNULL,
-        )
-        return True
-
-    # Try festival
-    if find_command("festival"):
+    engine = get_tts_engine()
+    if engine:
+        _, build = engine
+        args, stdin_text = build(text, rate)
         proc = subprocess.Popen(
-            ["festival", "--tts"],
-            stdin=subprocess.PIPE,
+            args,
+            stdin=subprocess.PIPE if stdin_text is not None else None,
             stdout=subprocess.DEVNULL,
             stderr=subprocess.DEVNULL,
         )
-        proc.stdin.write(text.encode())
-        proc.stdin.close()
+        if stdin_text is not None:
+            proc.stdin.write(stdin_text.encode())
+            proc.stdin.close()
         return True
 
     # Try pico2wave + aplay
     if find_command("pico2wave"):
-        tmp_wav = tempfile.mktemp(suffix=".wav", prefix="cctoast-tts-")
-        try:
-            subprocess.run(
-                ["pico2wave", "-w", tmp_wav, text],
-                check=True,
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL,
-            )
-            if find_command("paplay"):
-                subprocess.Popen(
-                    ["paplay", tmp_wav],
-                    stdout=subprocess.DEVNULL,
-                    stderr=subprocess.DEVNULL,
-                )
-            elif find_command("aplay"):
-                subprocess.Popen(
-                    ["aplay", "-q", tmp_wav],
-                    stdout=subprocess.DEVNULL,
-                    stderr=subprocess.DEVNULL,
-                )
-        except subprocess.CalledProcessError:
-            pass
-        finally:
-            # Clean up temp file after a delay (let player finish)
-            subprocess.Popen(
-                ["bash", "-c", f"sleep 5 && rm -f {tmp_wav}"],
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL,
-            )
+        speak_pico2wave(text)
         return True
 
     log_error("No TTS engine found (tried: spd-say, espeak-ng, espeak, festival, pico2wave)")
     return False
 
 
+def get_sound_index() -> Dict[str, Path]:
+    """
+    Index sound files in common locations by sound name.
+
+    Each directory is scanned once; earlier directories and extensions win.
+    """
+    global _SOUND_INDEX
+    if _SOUND_INDEX is not None:
+        return _SOUND_INDEX
+
+    _SOUND_INDEX = {}
+    for sound_dir in SOUND_DIRS:
+        found = []
+        try:
+            with os.scandir(sound_dir) as entries:
+                for entry in entries:
+                    stem, ext = os.path.splitext(entry.name)
+                    if ext in SOUND_EXTENSIONS and entry.is_file():
+                        found.append((SOUND_EXTENSIONS.index(ext), stem, entry.path))
+        except OSError:
+            continue
+        for _, stem, path in sorted(found):
+            _SOUND_INDEX.setdefault(stem, Path(path))
+
+    return _SOUND_INDEX
+
+
 def play_sound(sound_name: str) -> bool:
     """Play sound using available sound player."""
     if not sound_name:
         return True
 
-    # Try to find the sound file in common locations
-    sound_file = None
-    sound_dirs = [
-        Path("/usr/share/sounds/freedesktop/stereo"),
-        Path("/usr/share/sounds/Oxygen"),
-        Path.home() / ".local" / "share" / "sounds",
-    ]
-
-    extensions = [".oga", ".ogg", ".wav"]
-
-    for sound_dir in sound_dirs:
-        for ext in extensions:
-            candidate = sound_dir / f"{sound_name}{ext}"
-            if candidate.exists():
-                sound_file = candidate
-                break
-        if sound_file:
-            break
+    sound_file = get_sound_index().get(sound_name)
 
     # If no file found, try canberra-gtk-play which uses sound themes
     if not sound_file:
@@ -417,31 +538,44 @@ def play_sound(sound_name: str) -> bool:
             return True
 
     # Play the sound file if found
-    if sound_file and sound_file.exists():
-        if find_command("paplay"):
-            subprocess.Popen(
-                ["paplay", str(sound_file)],
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL,
-            )
-        elif find_command("pw-play"):
-            subprocess.Popen(
-                ["pw-play", str(sound_file)],
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL,
-            )
-        elif find_command("aplay"):
-            subprocess.Popen(
-                ["aplay", "-q", str(sound_file)],
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL,
-            )
+    player = get_sound_player()
+    if sound_file and player:
+        args = [player, str(sound_file)]
+        if player == "aplay":
+            args.insert(1, "-q")
+        subprocess.Popen(
+            args,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
 
     return True
 
 
+def start_notification_process(tool: str, args: List[str], **kwargs: Any) -> bool:
+    """Start a notification tool without waiting (see wait_for_notifications)."""
+    try:
+        _PENDING_NOTIFICATIONS.append((tool, subprocess.Popen(args, **kwargs)))
+        return True
+    except OSError as e:
+        log_error(f"{tool} failed: {e}")
+        return False
+
+
+def wait_for_notifications() -> bool:
+    """Wait for started notification tools. Returns False if any of them failed."""
+    success = True
+    while _PENDING_NOTIFICATIONS:
+        tool, proc = _PENDING_NOTIFICATIONS.pop(0)
+        if proc.wait() != 0:
+            log_error(f"{tool} failed: exit status {proc.returncode}")
+            success = False
+    return success
+
+
+@functools.lru_cache(maxsize=None)
 def get_notification_tool() -> Optional[str]:
-    """Check for available notification tools."""
+    """Check for available notification tools, resolved once per run."""
     # Prefer notify-send as it's most universal and works well with KDE
     if find_command("notify-send"):
         return "notify-send"
@@ -450,11 +584,11 @@ def get_notification_tool() -> Optional[str]:
     if find_command("kdialog"):
         return "kdialog"
 
-    # Try gdbus for direct D-Bus communication
-    if find_command("gdbus"):
+    # Try direct D-Bus communication (in-process via jeepney, or the gdbus binary)
+    if have_jeepney() or find_command("gdbus"):
         return "gdbus"
 
-    log_error("No notification tool found (notify-send, kdialog, or gdbus)")
+    log_error("No notification tool found (notify-send, kdialog, jeepney or gdbus)")
     return None
 
 
@@ -467,8 +601,7 @@ def send_notify_send(
     app_name: str = "Claude Code",
 ) -> bool:
     """Send notification using notify-send."""
-    debug = os.environ.get("CCTOAST_DEBUG") == "1"
-    if debug:
+    if DEBUG:
         print("DEBUG: Calling notify-send...", file=sys.stderr)
         print(f"DEBUG:   title={title}", file=sys.stderr)
         print(f"DEBUG:   message={message}", file=sys.stderr)
@@ -484,8 +617,8 @@ def send_notify_send(
         f"--urgency={urgency}",
     ]
 
-    # Add icon if provided and exists
-    if icon and Path(icon).exists():
+    # Add icon if provided (already checked to exist by main)
+    if icon:
         args.append(f"--icon={icon}")
 
     # Add sound hint for KDE/freedesktop
@@ -494,79 +627,246 @@ def send_notify_send(
 
     args.extend([title, message])
 
-    if debug:
+    if DEBUG:
         print(f"DEBUG: {' '.join(args)}", file=sys.stderr)
 
-    try:
-        subprocess.run(args, check=True)
-        return True
-    except subprocess.CalledProcessError as e:
-        log_error(f"notify-send failed: {e}")
-        return False
+    return start_notification_process("notify-send", args)
 
 
 def send_kdialog(title: str, message: str, icon: Optional[str]) -> bool:
     """Send notification using kdialog."""
-    debug = os.environ.get("CCTOAST_DEBUG") == "1"
-
     timeout_seconds = NOTIFICATION_TIMEOUT // 1000
     args = ["kdialog", f"--title={title}", "--passivepopup", message, str(timeout_seconds)]
 
     # kdialog --passivepopup doesn't support custom icons directly
     # but we can use --icon for the window icon
-    if icon and Path(icon).exists():
+    if icon:
         args.insert(1, f"--icon={icon}")
 
-    if debug:
+    if DEBUG:
         print(f"DEBUG: {' '.join(args)}", file=sys.stderr)
 
-    try:
-        subprocess.run(args, check=True)
-        return True
-    except subprocess.CalledProcessError as e:
-        log_error(f"kdialog failed: {e}")
-        return False
+    return start_notification_process("kdialog", args)
+
+
+@functools.lru_cache(maxsize=None)
+def have_jeepney() -> bool:
+    """Check whether jeepney is installed, without importing it."""
+    import importlib.util
+
+    return importlib.util.find_spec("jeepney") is not None
+
+
+def get_dbus_connection():
+    """Get the session bus connection, opening it on first use (needs jeepney)."""
+    global _DBUS_CONNECTION, NOTIFY
+    if _DBUS_CONNECTION is None:
+        # Imported here so runs using other notification tools never load jeepney
+        from jeepney import DBusAddress
+        from jeepney.io.blocking import open_dbus_connection
+
+        NOTIFY = DBusAddress(
+            "/org/freedesktop/Notifications",
+            bus_name="org.freedesktop.Notifications",
+            interface="org.freedesktop.Notifications",
+        )
+        _DBUS_CONNECTION = open_dbus_connection(bus="SESSION")
+    return _DBUS_CONNECTION
+
+
+def build_notify_hints(
+    urgency: str = "normal", sound: Optional[str] = None, resolve_sound_file: bool = True
+) -> Dict[str, Tuple[str, Any]]:
+    """
+    Build Notify hints as {name: (D-Bus signature, value)}.
+
+    Used for every D-Bus path, including cctoast-kde-notifyd, so they all send
+    the same hints. Only pass a sound the server will play: resolving
+    sound-file scans the sound directories (the daemon resolves it itself).
+    """
+    hints: Dict[str, Tuple[str, Any]] = {"urgency": ("y", URGENCY_LEVELS.get(urgency, 1))}
+    if sound:
+        hints["sound-name"] = ("s", sound)
+        sound_file = get_sound_index().get(sound) if resolve_sound_file else None
+        if sound_file:
+            hints["sound-file"] = ("s", str(sound_file))
+    return hints
+
+
+def gvariant_string(value: str) -> str:
+    """Quote a string as a GVariant text-format literal."""
+    return "'" + value.replace("\\", "\\\\").replace("'", "\\'") + "'"
+
+
+def gvariant_hints(hints: Dict[str, Tuple[str, Any]]) -> str:
+    """Format hints from build_notify_hints as a GVariant text-format a{sv}."""
+    items = []
+    for key, (signature, value) in hints.items():
+        if signature == "y":
+            variant = f"<byte {value}>"
+        else:
+            variant = f"<{gvariant_string(value)}>"
+        items.append(f"{gvariant_string(key)}: {variant}")
+    return "{" + ", ".join(items) + "}"
+
+
+@functools.lru_cache(maxsize=None)
+def get_server_capabilities() -> Tuple[str, ...]:
+    """Ask the notification server for its capabilities, once per run (needs jeepney)."""
+    from jeepney import new_method_call
+    from jeepney.wrappers import unwrap_msg
+
+    conn = get_dbus_connection()
+    reply = conn.send_and_get_reply(
+        new_method_call(NOTIFY, "GetCapabilities"), timeout=DBUS_CALL_TIMEOUT
+    )
+    return tuple(unwrap_msg(reply)[0])
 
 
 def send_gdbus(
-    title: str, message: str, icon: Optional[str], app_name: str = "Claude Code"
+    title: str,
+    message: str,
+    icon: Optional[str],
+    app_name: str = "Claude Code",
+    sound: Optional[str] = None,
+    urgency: str = "normal",
 ) -> bool:
-    """Send notification using gdbus (D-Bus)."""
-    debug = os.environ.get("CCTOAST_DEBUG") == "1"
+    """
+    Send notification using D-Bus (jeepney in-process, or the gdbus binary).
 
-    icon_arg = icon if icon and Path(icon).exists() else ""
+    The sound is passed as a hint when the server reports the "sound"
+    capability, and played with play_sound otherwise.
+    """
+    icon_arg = icon or ""
 
-    if debug:
+    if have_jeepney():
+        from jeepney import DBusErrorResponse, new_method_call
+        from jeepney.wrappers import unwrap_msg
+
+        if DEBUG:
+            print("DEBUG: jeepney call to org.freedesktop.Notifications", file=sys.stderr)
+
+        server_plays_sound = False
+        try:
+            conn = get_dbus_connection()
+            server_plays_sound = "sound" in get_server_capabilities()
+            hints = build_notify_hints(urgency, sound if server_plays_sound else None)
+
+            reply = conn.send_and_get_reply(
+                new_method_call(
+                    NOTIFY,
+                    "Notify",
+                    "susssasa{sv}i",
+                    (
+                        app_name,
+                        0,
+                        icon_arg,
+                        title,
+                        message,
+                        [],
+                        hints,
+                        NOTIFICATION_TIMEOUT,
+                    ),
+                ),
+                timeout=DBUS_CALL_TIMEOUT,
+            )
+            unwrap_msg(reply)
+            result = True
+        except TimeoutError:
+            log_error("D-Bus Notify timed out")
+            server_plays_sound = False
+            result = False
+        except (OSError, KeyError, DBusErrorResponse) as e:
+            log_error(f"D-Bus Notify failed: {e}")
+            server_plays_sound = False
+            result = False
+
+        if not server_plays_sound:
+            play_sound(sound)
+        return result
+
+    # The gdbus binary can't query capabilities without another process
+    play_sound(sound)
+
+    if DEBUG:
         print("DEBUG: gdbus call to org.freedesktop.Notifications", file=sys.stderr)
 
+    return start_notification_process(
+        "gdbus",
+        [
+            "gdbus",
+            "call",
+            "--session",
+            "--dest",
+            "org.freedesktop.Notifications",
+            "--object-path",
+            "/org/freedesktop/Notifications",
+            "--method",
+            "org.freedesktop.Notifications.Notify",
+            app_name,
+            "0",
+            icon_arg,
+            title,
+            message,
+            "[]",
+            gvariant_hints(build_notify_hints(urgency)),
+            str(NOTIFICATION_TIMEOUT),
+        ],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+def send_via_daemon(
+    title: str,
+    message: str,
+    icon: Optional[str],
+    urgency: str = "normal",
+    sound: Optional[str] = None,
+    app_name: str = "Claude Code",
+) -> bool:
+    """
+    Hand the notification to cctoast-kde-notifyd over its datagram socket.
+
+    Returns False if the daemon isn't running, so the caller can fall back.
+    """
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if not runtime_dir:
+        return False
+
+    # A stat is far cheaper than importing socket and building the request
+    socket_path = os.path.join(runtime_dir, DAEMON_SOCKET_NAME)
+    if not os.path.exists(socket_path):
+        return False
+
+    # The daemon resolves sound-file from its own sound index, or plays the
+    # sound itself if its server can't
+    data = json.dumps(
+        {
+            "title": title,
+            "message": message,
+            "icon": icon,
+            "app_name": app_name,
+            "hints": build_notify_hints(urgency, sound, resolve_sound_file=False),
+        }
+    ).encode()
+    if len(data) > DAEMON_MAX_DATAGRAM_SIZE:
+        return False
+
+    # Imported here so runs without the daemon never load it
+    import socket
+
     try:
-        subprocess.run(
-            [
-                "gdbus",
-                "call",
-                "--session",
-                "--dest",
-                "org.freedesktop.Notifications",
-                "--object-path",
-                "/org/freedesktop/Notifications",
-                "--method",
-                "org.freedesktop.Notifications.Notify",
-                app_name,
-                "0",
-                icon_arg,
-                title,
-                message,
-                "[]",
-                "{}",
-                str(NOTIFICATION_TIMEOUT),
-            ],
-            check=True,
-            stdout=subprocess.DEVNULL,
-            stderr=subprocess.DEVNULL,
-        )
+        with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sock:
+            # Never wait on a daemon that has stopped reading its queue
+            sock.setblocking(False)
+            sock.sendto(data, socket_path)
         return True
-    except subprocess.CalledProcessError as e:
-        log_error(f"gdbus failed: {e}")
+    except BlockingIOError:
+        # Queue full: treat the daemon as unavailable and fall back
+        return False
+    except OSError:
+        # No socket, or a stale one left by a daemon that isn't running
         return False
 
 
@@ -578,15 +878,23 @@ def execute_notification(
     sound: Optional[str] = None,
     app_name: str = "Claude Code",
 ) -> bool:
-    """Main execution function for sending notifications."""
-    debug = os.environ.get("CCTOAST_DEBUG") == "1"
+    """
+    Main execution function for sending notifications.
+
+    The icon must be an existing file path or None; the send_* functions
+    don't check it again.
+    """
+    if send_via_daemon(title, message, icon, urgency, sound, app_name):
+        if DEBUG:
+            print("DEBUG: Sent via cctoast-kde-notifyd", file=sys.stderr)
+        return True
 
     tool = get_notification_tool()
     if not tool:
         log_error("No notification tool available")
         return False
 
-    if debug:
+    if DEBUG:
         print(f"DEBUG: Using notification tool: {tool}", file=sys.stderr)
         print(f"DEBUG: Title: {title}", file=sys.stderr)
         print(f"DEBUG: Message: {message}", file=sys.stderr)
@@ -602,28 +910,55 @@ def execute_notification(
         play_sound(sound)
         return result
     elif tool == "gdbus":
-        result = send_gdbus(title, message, icon, app_name)
-        play_sound(sound)
-        return result
+        # send_gdbus plays the sound itself unless the server supports it
+        return send_gdbus(title, message, icon, app_name, sound, urgency=urgency)
     else:
         log_error(f"Unknown notification tool: {tool}")
         return False
 
 
-def main() -> int:
-    """Main entry point."""
-    debug = os.environ.get("CCTOAST_DEBUG") == "1"
+def default_args(**overrides: Any) -> SimpleNamespace:
+    """Build an args namespace with the same defaults as the argument parser."""
+    defaults: Dict[str, Any] = {
+        "source": "auto",
+        "notification_hook": False,
+        "stop_hook": False,
+        "title": None,
+        "message": None,
+        "image": None,
+        "urgency": None,
+        "sound": None,
+        "no_sound": False,
+        "tts": False,
+        "json_payload": None,
+    }
+    defaults.update(overrides)
+    return SimpleNamespace(**defaults)
+
+
+def parse_hook_args(argv: List[str]) -> Optional[SimpleNamespace]:
+    """
+    Parse the argument shapes hooks are invoked with, without argparse.
 
-    # Detect execution context (installed vs development)
-    context_type, context_root = detect_context()
+    Returns None for anything else, which needs the full parser.
+    """
+    if argv == ["--notification-hook"]:
+        return default_args(notification_hook=True)
+    if argv == ["--stop-hook"]:
+        return default_args(stop_hook=True)
+    if len(argv) == 1 and argv[0].startswith("{"):
+        return default_args(json_payload=argv[0])
+    return None
 
-    if debug:
-        print(f"DEBUG: Context: {context_type}", file=sys.stderr)
-        print(f"DEBUG: Root: {context_root}", file=sys.stderr)
 
-    # We need to parse args before detecting AI platform because --source can override
-    # But we also need to handle Codex's positional JSON argument
-    # Solution: Use parse_known_args to get our flags, leaving positional args alone
+def parse_args(argv: List[str]) -> Any:
+    """Parse command line arguments, skipping argparse for hook invocations."""
+    args = parse_hook_args(argv)
+    if args is not None:
+        return args
+
+    # Only manual invocations pay for importing and building the parser
+    import argparse
 
     parser = argparse.ArgumentParser(
         description="KDE Plasma Wayland notification script for Claude Code and Codex CLI.",
@@ -703,38 +1038,26 @@ Environment variables:
         help=argparse.SUPPRESS,  # Hidden, used for Codex compatibility
     )
 
-    args = parser.parse_args()
+    return parser.parse_args(argv)
+
+
+def main() -> int:
+    """Main entry point."""
+    # Detect execution context (installed vs development)
+    context_type, context_root = detect_context()
+
+    if DEBUG:
+        print(f"DEBUG: Context: {context_type}", file=sys.stderr)
+        print(f"DEBUG: Root: {context_root}", file=sys.stderr)
+
+    # Parse args before detecting AI platform because --source can override it,
+    # and Codex's JSON payload arrives as a positional argument
+    args = parse_args(sys.argv[1:])
 
     # Detect AI platform and get payload
-    platform: str
-    payload: Optional[Dict[str, Any]] = None
+    platform, payload = resolve_platform(args)
     parsed: Optional[ParsedPayload] = None
 
-    if args.source != "auto":
-        # Forced platform selection
-        platform = args.source
-        if debug:
-            print(f"DEBUG: Platform forced to: {platform}", file=sys.stderr)
-    else:
-        # Auto-detect platform
-        # First check if there's a JSON positional argument (Codex pattern)
-        if args.json_payload:
-            try:
-                payload = json.loads(args.json_payload)
-                if isinstance(payload, dict) and "type" in payload:
-                    platform = PLATFORM_CODEX
-                    if debug:
-                        print(f"DEBUG: Detected Codex CLI from positional JSON", file=sys.stderr)
-                else:
-                    platform = PLATFORM_MANUAL
-            except json.JSONDecodeError:
-                platform = PLATFORM_MANUAL
-        else:
-            # Try stdin detection (already consumed by detect_ai_platform if present)
-            detected_platform, detected_payload = detect_ai_platform()
-            platform = detected_platform
-            payload = detected_payload
-
     # Parse payload based on platform
     if platform == PLATFORM_CODEX and payload:
         parsed = parse_codex_payload(payload)
@@ -779,9 +1102,9 @@ Environment variables:
     final_icon: Optional[str] = None
     if args.image:
         image_path = Path(args.image).expanduser()
-        if image_path.exists():
+        if os.path.isfile(image_path):
             final_icon = str(image_path)
-            if debug:
+            if DEBUG:
                 print(f"DEBUG: Using custom image: {final_icon}", file=sys.stderr)
         else:
             print(f"WARNING: Image file not found: {args.image}, using platform default", file=sys.stderr)
@@ -790,19 +1113,20 @@ Environment variables:
     if not final_icon:
         # Use platform-appropriate icon
         platform_icon = get_icon_for_platform(platform, context_type, context_root)
-        if platform_icon.exists():
+        if os.path.isfile(platform_icon):
             final_icon = str(platform_icon)
-            if debug:
+            if DEBUG:
                 print(f"DEBUG: Using platform icon ({platform}): {final_icon}", file=sys.stderr)
         else:
             # Fall back to claude.png if platform icon doesn't exist
+            # (no need to check again when the platform icon was claude.png)
             fallback_icon = get_default_icon(context_type, context_root)
-            if fallback_icon.exists():
+            if fallback_icon != platform_icon and os.path.isfile(fallback_icon):
                 final_icon = str(fallback_icon)
-                if debug:
+                if DEBUG:
                     print(f"DEBUG: Platform icon not found, using fallback: {final_icon}", file=sys.stderr)
             else:
-                if debug:
+                if DEBUG:
                     print(f"DEBUG: No icon available", file=sys.stderr)
 
     # Determine app name for notifications
@@ -821,7 +1145,7 @@ Environment variables:
         # TTS enabled but no explicit sound setting - no sound
         sound = None
 
-    if debug:
+    if DEBUG:
         print(f"DEBUG: Platform: {platform}", file=sys.stderr)
         print(f"DEBUG: Title: {title}", file=sys.stderr)
         print(f"DEBUG: Message: {message}", file=sys.stderr)
@@ -830,13 +1154,16 @@ Environment variables:
         print(f"DEBUG: TTS enabled: {tts_enabled}", file=sys.stderr)
         print(f"DEBUG: Final sound: {sound or 'none'}", file=sys.stderr)
 
+    # Execute notification, started first so it runs alongside TTS
+    sent = execute_notification(title, message, final_icon, urgency, sound, app_name)
+
     # Execute TTS if enabled
     if tts_enabled:
         tts_text = args.tts if isinstance(args.tts, str) else message
         speak_text(tts_text)
 
-    # Execute notification
-    if not execute_notification(title, message, final_icon, urgency, sound, app_name):
+    # Wait for the notification tool to finish before reporting the result
+    if not wait_for_notifications() or not sent:
         if hook_mode:
             return 0  # Silent exit for hook mode
         else: